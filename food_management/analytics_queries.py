@@ -0,0 +1,94 @@
+# analytics_queries.py
+# Analytics SQL for food.py. Kept in an imported module so the definitions are
+# built once per process (cached in sys.modules) rather than on every rerun.
+
+# SUMs are CAST to BIGINT: DuckDB returns HUGEINT (a float64 column in pandas) while
+# sqlite returns integers, so without it the dtype depends on which engine ran.
+ANALYTICS_QUERIES = {
+    "Providers vs Receivers by City": """
+        SELECT City, COUNT(*) FILTER (WHERE kind='P') AS Providers,
+               COUNT(*) FILTER (WHERE kind='R') AS Receivers,
+               COUNT(*) AS Total
+        FROM v_entity_city
+        GROUP BY City
+        ORDER BY Total DESC
+        LIMIT 10;
+    """,
+    "Top Provider Types by Quantity": """
+        SELECT p.Provider_Type, CAST(SUM(f.Quantity) AS BIGINT) AS Total_Quantity
+        FROM Food_Listings f
+        JOIN Providers p ON p.Provider_ID = f.Provider_ID
+        GROUP BY p.Provider_Type
+        ORDER BY Total_Quantity DESC
+        LIMIT 10;
+    """,
+    "Top Receivers by Claims": """
+        SELECT r.Receiver_ID, r.Name, COUNT(*) AS Claim_Count
+        FROM Claims c
+        JOIN Receivers r ON r.Receiver_ID = c.Receiver_ID
+        GROUP BY r.Receiver_ID, r.Name
+        ORDER BY Claim_Count DESC
+        LIMIT 10;
+    """,
+    "Food Totals": """
+        SELECT CAST(SUM(Quantity) AS BIGINT) AS Total_Quantity,
+               COUNT(*) FILTER (WHERE Expiry_Jd < ?) AS Wasted_Listings,
+               CAST(SUM(Quantity) FILTER (WHERE Expiry_Jd < ?) AS BIGINT) AS Wasted_Quantity
+        FROM Food_Listings;
+    """,
+    "Most Common Food Types": """
+        SELECT Food_Type, COUNT(*) AS Count_Listings
+        FROM Food_Listings
+        GROUP BY Food_Type
+        ORDER BY Count_Listings DESC
+        LIMIT 10;
+    """,
+    "Claims Per Food Item": """
+        SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claims
+        FROM Food_Listings f
+        LEFT JOIN Claims c ON c.Food_ID = f.Food_ID
+        GROUP BY f.Food_Name
+        ORDER BY Claims DESC
+        LIMIT 10;
+    """,
+    "Total Quantity by Provider": """
+        SELECT p.Name, CAST(SUM(f.Quantity) AS BIGINT) AS Total_Quantity
+        FROM Food_Listings f
+        JOIN Providers p ON p.Provider_ID = f.Provider_ID
+        GROUP BY p.Name
+        ORDER BY Total_Quantity DESC
+        LIMIT 10;
+    """,
+    "Claims by City": """
+        SELECT f.Location AS City, COUNT(*) AS Claims
+        FROM Claims c
+        JOIN Food_Listings f ON f.Food_ID = c.Food_ID
+        GROUP BY f.Location
+        ORDER BY Claims DESC
+        LIMIT 10;
+    """,
+    "Listings Near Expiry": """
+        SELECT Food_ID, Food_Name, Quantity, Expiry_Date, Location
+        FROM Food_Listings
+        WHERE Expiry_Jd <= ?
+        ORDER BY Expiry_Jd ASC;
+    """
+}
+
+# Queries whose single result row is shown as several panels: {query: {panel: columns}}.
+# "Food Totals" computes both cards in one scan of Food_Listings.
+SPLIT_PANELS = {
+    "Food Totals": {
+        "Total Food Available": ["Total_Quantity"],
+        "Total Wasted Food": ["Wasted_Listings", "Wasted_Quantity"],
+    },
+}
+
+# Queries that aggregate every listing, so FOODAPP_EXPLAIN does not flag their
+# full scans of Food_Listings
+FULL_SCAN_QUERIES = {
+    "Top Provider Types by Quantity",
+    "Food Totals",
+    "Claims Per Food Item",
+    "Total Quantity by Provider",
+}
@@ -1,17 +1,64 @@
 # food.py
 import streamlit as st
 import sqlite3
+import atexit
+import io
+import logging
+import os
+import queue
+import re
+import threading
 import pandas as pd
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from analytics_queries import ANALYTICS_QUERIES, FULL_SCAN_QUERIES, SPLIT_PANELS
+
+# Optional: DuckDB runs the analytics GROUP BY/JOINs in its vectorized engine
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Optional: ADBC streams result sets as Arrow columns instead of per-row Python tuples
+try:
+    import adbc_driver_sqlite.dbapi as adbc
+except ImportError:
+    adbc = None
+
+# Optional: pyarrow's C++ CSV writer is much faster than pandas' for wide tables
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Must be the first Streamlit call, ahead of any cached-resource spinner
+st.set_page_config(page_title="🍽️ Food Donation Management", layout="wide")
 
 # ========================
 # 📌 Database Setup
 # ========================
 DB_FILE = "food_donations.db"
-conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-cursor = conn.cursor()
 
-def init_db():
+# Dev-only query plan checks: FOODAPP_EXPLAIN=1 logs every statement and warns
+# when a query full-scans Food_Listings/Claims instead of using an index.
+DEBUG_PLANS = os.getenv("FOODAPP_EXPLAIN") == "1"
+PLAN_TABLES = ("Food_Listings", "Claims")
+logger = logging.getLogger(__name__)
+if DEBUG_PLANS:
+    # The app configures no logging otherwise, and debug is below the default level
+    logging.basicConfig()
+    logger.setLevel(logging.DEBUG)
+
+# Store dates as ISO text; Expiry_Jd holds the same date as a Julian Day Number
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+
+def to_jd(d):
+    return d.toordinal() + 1721425
+
+def init_db(conn):
+    cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS Providers (
             Provider_ID INTEGER PRIMARY KEY,
@@ -52,41 +99,311 @@ def init_db():
             FOREIGN KEY (Receiver_ID) REFERENCES Receivers (Receiver_ID)
         );
     """)
+    # Indexes on the join/filter/group-by columns used by the analytics queries
+    cursor.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_food_provider ON Food_Listings(Provider_ID);
+        CREATE INDEX IF NOT EXISTS idx_food_location ON Food_Listings(Location);
+        CREATE INDEX IF NOT EXISTS idx_food_type     ON Food_Listings(Food_Type);
+        CREATE INDEX IF NOT EXISTS idx_claims_food   ON Claims(Food_ID);
+        CREATE INDEX IF NOT EXISTS idx_claims_recv   ON Claims(Receiver_ID);
+        CREATE INDEX IF NOT EXISTS idx_prov_city     ON Providers(City);
+        CREATE INDEX IF NOT EXISTS idx_recv_city     ON Receivers(City);
+        CREATE INDEX IF NOT EXISTS idx_prov_name     ON Providers(Name COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_food_location_nc ON Food_Listings(Location COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_food_type_nc     ON Food_Listings(Food_Type COLLATE NOCASE);
+    """)
+    # Shared city rows for the city breakdowns, instead of an inline UNION ALL per query
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS v_entity_city AS
+          SELECT City, 'P' AS kind FROM Providers
+          UNION ALL
+          SELECT City, 'R' AS kind FROM Receivers;
+    """)
     conn.commit()
 
     # Insert sample data if empty
     cursor.execute("SELECT COUNT(*) FROM Providers")
     if cursor.fetchone()[0] == 0:
-        cursor.executemany("INSERT INTO Providers VALUES (?,?,?,?,?)", [
+        providers_rows = [
             (1, "FoodBank Hyderabad", "NGO", "9999999999", "Hyderabad"),
             (2, "FreshMart", "Supermarket", "8888888888", "Mumbai")
-        ])
-        cursor.executemany("INSERT INTO Receivers VALUES (?,?,?,?)", [
+        ]
+        receivers_rows = [
             (1, "Helping Hands", "7777777777", "Hyderabad"),
             (2, "City Shelter", "6666666666", "Mumbai")
-        ])
-        cursor.executemany("INSERT INTO Food_Listings VALUES (?,?,?,?,?,?,?,?)", [
+        ]
+        food_rows = [
             (1, "Rice Bags", "Grain", "Lunch", 100, "2025-08-20", 1, "Hyderabad"),
             (2, "Bread Packets", "Bakery", "Breakfast", 50, "2025-08-18", 2, "Mumbai")
-        ])
-        cursor.executemany("INSERT INTO Claims VALUES (?,?,?,?)", [
+        ]
+        claims_rows = [
             (1, 1, 1, "Completed"),
             (2, 2, 2, "Pending")
-        ])
+        ]
+        # One transaction (and one commit/fsync) for the whole seed
+        with conn:
+            cursor.executemany("INSERT INTO Providers VALUES (?,?,?,?,?)", providers_rows)
+            cursor.executemany("INSERT INTO Receivers VALUES (?,?,?,?)", receivers_rows)
+            cursor.executemany(
+                """INSERT INTO Food_Listings
+                   (Food_ID, Food_Name, Food_Type, Meal_Type, Quantity, Expiry_Date, Provider_ID, Location)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                food_rows,
+            )
+            cursor.executemany("INSERT INTO Claims VALUES (?,?,?,?)", claims_rows)
+
+    # Integer expiry column: range scans compare varints instead of date strings.
+    # Added by migration so existing databases pick it up too, and kept in step
+    # with Expiry_Date by triggers so every writer, not just this app, fills it.
+    cursor.execute("PRAGMA table_info(Food_Listings)")
+    if "Expiry_Jd" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE Food_Listings ADD COLUMN Expiry_Jd INTEGER")
+    with conn:
+        cursor.execute("""
+            UPDATE Food_Listings SET Expiry_Jd = CAST(julianday(Expiry_Date) + 0.5 AS INTEGER)
+            WHERE Expiry_Jd IS NULL
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_food_expiry")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_food_expjd ON Food_Listings(Expiry_Jd)")
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_food_expjd_insert AFTER INSERT ON Food_Listings
+            BEGIN
+                UPDATE Food_Listings SET Expiry_Jd = CAST(julianday(NEW.Expiry_Date) + 0.5 AS INTEGER)
+                WHERE Food_ID = NEW.Food_ID;
+            END;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_food_expjd_update AFTER UPDATE OF Expiry_Date ON Food_Listings
+            BEGIN
+                UPDATE Food_Listings SET Expiry_Jd = CAST(julianday(NEW.Expiry_Date) + 0.5 AS INTEGER)
+                WHERE Food_ID = NEW.Food_ID;
+            END;
+        """)
+
+    # Gather planner statistics once so the new indexes are actually chosen
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'")
+    if cursor.fetchone() is None:
+        cursor.execute("ANALYZE")
         conn.commit()
 
-init_db()
+# Tuning shared by every connection. WAL lets readers keep going during CRUD
+# writes, and NORMAL sync is safe under WAL.
+CONN_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;   -- 64 MB
+    PRAGMA mmap_size=268435456; -- 256 MB
+    PRAGMA foreign_keys=ON;
+"""
+
+def open_conn():
+    # cached_statements: keep compiled statements for the hot SQL across reruns
+    c = sqlite3.connect(DB_FILE, check_same_thread=False, cached_statements=256)
+    c.executescript(CONN_PRAGMAS)
+    if DEBUG_PLANS:
+        c.set_trace_callback(logger.debug)
+    return c
+
+# Write connection, one per server process and shared by every session. A sqlite
+# transaction belongs to the connection, so all use of it goes through
+# write_lock; otherwise one session's rollback could undo another's write.
+@st.cache_resource
+def get_conn():
+    c = open_conn()
+    init_db(c)
+    # Refresh planner statistics when the server shuts down
+    atexit.register(c.execute, "PRAGMA optimize")
+    return c
+
+@st.cache_resource
+def get_write_lock():
+    return threading.Lock()
+
+conn = get_conn()
+write_lock = get_write_lock()
+
+# Refresh planner statistics; cheap no-op unless the tables changed a lot.
+# Call with write_lock held.
+def optimize_db():
+    conn.execute("PRAGMA optimize")
+
+# Read-only connection pool for every query the UI displays, so reads never touch
+# the shared write connection and analytics queries can run side by side.
+READ_POOL_SIZE = 4
+
+@st.cache_resource
+def get_read_pool():
+    get_conn()  # make sure the schema exists before any reader opens
+    pool = queue.Queue()
+    for _ in range(READ_POOL_SIZE):
+        rconn = open_conn()
+        rconn.execute("PRAGMA query_only=1")
+        pool.put(rconn)
+    return pool
+
+def pooled_sql(pool, q, params=()):
+    rconn = pool.get()
+    try:
+        return pd.read_sql_query(q, rconn, params=list(params))
+    finally:
+        pool.put(rconn)
+
+PLAN_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+(?:%s)\s+(?:AS\s+)?(\w+)" % "|".join(PLAN_TABLES), re.IGNORECASE)
+SQL_CLAUSE_WORDS = {"WHERE", "GROUP", "ORDER", "LIMIT", "JOIN", "LEFT", "INNER", "CROSS", "NATURAL",
+                    "ON", "USING", "UNION", "EXCEPT", "INTERSECT", "WINDOW", "HAVING"}
+
+# expect_scan: the query reads every row by design (whole-table aggregates, unfiltered
+# listings), so a full scan there is not a regression
+def check_plan(q, params=(), expect_scan=False):
+    if not DEBUG_PLANS or expect_scan:
+        return
+    pool = get_read_pool()
+    rconn = pool.get()
+    try:
+        plan = rconn.execute("EXPLAIN QUERY PLAN " + q, list(params or ())).fetchall()
+    finally:
+        pool.put(rconn)
+    # Plan rows name the alias when there is one ("SCAN f"), so map each
+    # "FROM/JOIN <table> [AS] <alias>" of a watched table back to the table
+    names = set(PLAN_TABLES)
+    for m in PLAN_ALIAS_RE.finditer(q):
+        if m.group(1).upper() not in SQL_CLAUSE_WORDS:
+            names.add(m.group(1))
+    for row in plan:
+        # Older SQLite writes "SCAN TABLE <table> [AS <alias>]"
+        parts = row[-1].replace("SCAN TABLE", "SCAN").split()
+        if parts[0] != "SCAN" or "INDEX" in parts:
+            continue
+        if parts[1] in names or parts[-1] in names:
+            logger.warning("Full scan (%s) in query: %s", row[-1], " ".join(q.split()))
+
+# One ADBC connection per server process, tuned like the sqlite3 ones. autocommit
+# keeps it from pinning an old WAL snapshot; the lock is needed because an ADBC
+# connection must not be used from two threads at once.
+@st.cache_resource
+def get_adbc():
+    get_conn()  # make sure the schema exists before reading
+    aconn = adbc.connect(DB_FILE, autocommit=True)
+    with aconn.cursor() as cur:
+        for pragma in ("temp_store=MEMORY", "cache_size=-65536", "mmap_size=268435456", "query_only=1"):
+            cur.execute(f"PRAGMA {pragma}")
+    return aconn, threading.Lock()
+
+# Read a query into a DataFrame, via Arrow when ADBC is installed
+def read_frame(q, params=None):
+    if adbc is None:
+        return pooled_sql(get_read_pool(), q, params or ())
+    aconn, lock = get_adbc()
+    with lock, aconn.cursor() as cur:
+        cur.execute(q, tuple(params) if params else None)
+        return cur.fetch_arrow_table().to_pandas(types_mapper=pd.ArrowDtype)
 
 # Helper to run queries
-def run_sql(q, params=None):
-    return pd.read_sql_query(q, conn, params=params)
+def run_sql(q, params=None, expect_scan=False):
+    check_plan(q, params, expect_scan)
+    return read_frame(q, params)
+
+# Cached variant for read-only queries; params must be a tuple so it is hashable.
+# Call st.cache_data.clear() after any write so stale results are not served.
+@st.cache_data(ttl=300)
+def cached_sql(q, params=(), expect_scan=False):
+    check_plan(q, params, expect_scan)
+    return read_frame(q, list(params))
+
+# DuckDB attached to the SQLite file read-only; "conn" is None when duckdb or its
+# sqlite extension is unavailable, or once DuckDB has been switched off after a
+# catalog error, and analytics then use the sqlite pool.
+@st.cache_resource
+def get_duckdb():
+    state = {"conn": None}
+    if duckdb is None:
+        return state
+    try:
+        ddb = duckdb.connect()
+        ddb.execute(f"INSTALL sqlite; LOAD sqlite; ATTACH '{DB_FILE}' AS s (TYPE sqlite, READ_ONLY);")
+        state["conn"] = ddb
+    except duckdb.Error as e:
+        logger.warning("DuckDB unavailable, analytics use sqlite: %s", e)
+    return state
+
+def analytics_sql(ddb_state, pool, q, params=()):
+    ddb = ddb_state["conn"]
+    if ddb is not None:
+        # One cursor per call: a DuckDB connection must not be shared across threads.
+        # Cursors start in the in-memory catalog, so select the attached file on each.
+        cur = ddb.cursor()
+        try:
+            cur.execute("USE s")
+            return cur.execute(q, list(params)).df()
+        except duckdb.CatalogException as e:
+            if "Function with name" in str(e):
+                # A SQLite-only function: unsupported SQL, not a broken attachment
+                logger.warning("DuckDB cannot run this query, using sqlite: %s", e)
+            else:
+                # The attached database is not what we expect; stop using DuckDB
+                logger.warning("DuckDB catalog error, switching analytics to sqlite: %s", e)
+                ddb_state["conn"] = None
+        except (duckdb.ParserException, duckdb.BinderException, duckdb.NotImplementedException) as e:
+            # SQL that DuckDB cannot parse or bind; sqlite can still answer it. Any
+            # other DuckDB error propagates and shows as "Query failed".
+            logger.warning("DuckDB cannot run this query, using sqlite: %s", e)
+        finally:
+            cur.close()
+    return pooled_sql(pool, q, params)
+
+# Raised out of run_analytics so st.cache_data does not cache a transient failure
+# (e.g. "database is locked"); carries whatever did succeed for this run.
+class AnalyticsError(Exception):
+    def __init__(self, results):
+        super().__init__("some analytics queries failed")
+        self.results = results
+
+# Runs every (title, sql, params) concurrently; returns {title: DataFrame}
+@st.cache_data(ttl=300)
+def run_analytics(items):
+    for title, sql, params in items:
+        check_plan(sql, params, title in FULL_SCAN_QUERIES)
+    ddb_state = get_duckdb()
+    pool = get_read_pool()
+    results = {}
+    failed = False
+    with ThreadPoolExecutor(max_workers=READ_POOL_SIZE) as ex:
+        futures = {title: ex.submit(analytics_sql, ddb_state, pool, sql, params) for title, sql, params in items}
+        for title, fut in futures.items():
+            try:
+                results[title] = fut.result()
+            except Exception as e:
+                results[title] = str(e)
+                failed = True
+    if failed:
+        raise AnalyticsError(results)
+    return results
+
+# Serialised once per distinct DataFrame, not on every rerun
+@st.cache_data
+def df_to_csv_bytes(df):
+    if pa is None:
+        return df.to_csv(index=False).encode()
+    buf = io.BytesIO()
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue()
 
-today = date.today().strftime('%Y-%m-%d')
+# Date bounds computed once in Python and bound as parameters, so SQLite range-scans
+# idx_food_expjd with integer comparisons instead of calling date() per row
+_today = date.today()
+today_jd = to_jd(_today)
+tomorrow_jd = to_jd(_today + timedelta(days=1))
+
+# Per-run bound parameters for ANALYTICS_QUERIES (Julian Day Numbers, see Expiry_Jd)
+query_params = {
+    "Listings Near Expiry": (tomorrow_jd,),
+    "Food Totals": (today_jd, today_jd),
+}
 
 # ========================
 # 🌐 Streamlit App UI
 # ========================
-st.set_page_config(page_title="🍽️ Food Donation Management", layout="wide")
 st.title("🍽️ Food Donation Management System")
 
 # ------------------------------
@@ -96,25 +413,35 @@ st.sidebar.header("🔍 Filter Donations")
 city_filter = st.sidebar.text_input("Filter by Location (City)")
 provider_filter = st.sidebar.text_input("Filter by Provider Name")
 food_type_filter = st.sidebar.text_input("Filter by Food Type")
+prefix_match = st.sidebar.checkbox("Prefix match (fast)")
+
+# Anchored patterns ('term%') let SQLite range-scan the NOCASE indexes
+def like_pattern(term):
+    return f"{term}%" if prefix_match else f"%{term}%"
 
-query = "SELECT * FROM Food_Listings WHERE 1=1"
+# Providers is only joined in when filtering by provider name
+joins = []
+where = ["1=1"]
 params = []
-if city_filter:
-    query += " AND Location LIKE ?"
-    params.append(f"%{city_filter}%")
 if provider_filter:
-    query += " AND Provider_ID IN (SELECT Provider_ID FROM Providers WHERE Name LIKE ?)"
-    params.append(f"%{provider_filter}%")
+    joins.append("JOIN Providers p ON p.Provider_ID = f.Provider_ID")
+    where.append("p.Name LIKE ?")
+    params.append(like_pattern(provider_filter))
+if city_filter:
+    where.append("f.Location LIKE ?")
+    params.append(like_pattern(city_filter))
 if food_type_filter:
-    query += " AND Food_Type LIKE ?"
-    params.append(f"%{food_type_filter}%")
+    where.append("f.Food_Type LIKE ?")
+    params.append(like_pattern(food_type_filter))
+query = f"SELECT f.Food_ID, f.Food_Name, f.Food_Type, f.Meal_Type, f.Quantity, f.Expiry_Date, f.Provider_ID, f.Location FROM Food_Listings f {' '.join(joins)} WHERE {' AND '.join(where)}"
 
 st.subheader("📦 Filtered Food Listings")
 try:
-    filtered = run_sql(query, params)
+    # Only anchored (prefix) filters can use an index
+    filtered = cached_sql(query, tuple(params), expect_scan=not (prefix_match and params))
     st.dataframe(filtered)
     if not filtered.empty:
-        st.download_button("⬇️ Download CSV", filtered.to_csv(index=False), "filtered_food.csv", "text/csv")
+        st.download_button("⬇️ Download CSV", df_to_csv_bytes(filtered), "filtered_food.csv", "text/csv")
 except Exception as e:
     st.warning(f"⚠️ {e}")
 
@@ -128,12 +455,12 @@ tab1, tab2 = st.tabs(["Providers", "Receivers"])
 with tab1:
     provs = run_sql("SELECT Provider_ID, Name, Provider_Type, Contact, City FROM Providers")
     st.dataframe(provs)
-    st.download_button("⬇️ Download Providers", provs.to_csv(index=False), "providers.csv", "text/csv")
+    st.download_button("⬇️ Download Providers", df_to_csv_bytes(provs), "providers.csv", "text/csv")
 
 with tab2:
     recvs = run_sql("SELECT Receiver_ID, Name, Contact, City FROM Receivers")
     st.dataframe(recvs)
-    st.download_button("⬇️ Download Receivers", recvs.to_csv(index=False), "receivers.csv", "text/csv")
+    st.download_button("⬇️ Download Receivers", df_to_csv_bytes(recvs), "receivers.csv", "text/csv")
 
 # ------------------------------
 # ✏️ CRUD OPERATIONS
@@ -149,127 +476,74 @@ if crud_choice == "Create":
         ftype = st.text_input("Food Type")
         mtype = st.text_input("Meal Type")
         qty = st.number_input("Quantity", step=1)
-        expiry = st.date_input("Expiry Date").strftime('%Y-%m-%d')
+        expiry = st.date_input("Expiry Date")
         pid = st.number_input("Provider ID", step=1)
         loc = st.text_input("Location")
         submit = st.form_submit_button("Add Food")
         if submit:
-            cursor.execute(
-                """INSERT INTO Food_Listings VALUES (?,?,?,?,?,?,?,?)""",
-                (food_id, name, ftype, mtype, qty, expiry, pid, loc),
-            )
-            conn.commit()
-            st.success("✅ Food added!")
+            try:
+                with write_lock, conn:
+                    conn.execute(
+                        """INSERT INTO Food_Listings
+                           (Food_ID, Food_Name, Food_Type, Meal_Type, Quantity, Expiry_Date, Provider_ID, Location)
+                           VALUES (?,?,?,?,?,?,?,?)""",
+                        (food_id, name, ftype, mtype, qty, expiry, pid, loc),
+                    )
+                    optimize_db()
+                st.cache_data.clear()
+                st.success("✅ Food added!")
+            except sqlite3.IntegrityError as e:
+                st.error(f"❌ {e}")
 
 elif crud_choice == "Update":
     fid = st.number_input("Food ID to update", step=1)
     new_qty = st.number_input("New Quantity", step=1)
     if st.button("Update"):
-        cursor.execute("UPDATE Food_Listings SET Quantity=? WHERE Food_ID=?", (new_qty, fid))
-        conn.commit()
+        with write_lock, conn:
+            conn.execute("UPDATE Food_Listings SET Quantity=? WHERE Food_ID=?", (new_qty, fid))
+            optimize_db()
+        st.cache_data.clear()
         st.success("✅ Updated!")
 
 elif crud_choice == "Delete":
     fid = st.number_input("Food ID to delete", step=1)
     if st.button("Delete"):
-        cursor.execute("DELETE FROM Food_Listings WHERE Food_ID=?", (fid,))
-        conn.commit()
-        st.success("✅ Deleted!")
+        try:
+            with write_lock, conn:
+                conn.execute("DELETE FROM Food_Listings WHERE Food_ID=?", (fid,))
+                optimize_db()
+            st.cache_data.clear()
+            st.success("✅ Deleted!")
+        except sqlite3.IntegrityError as e:
+            st.error(f"❌ {e}")
 
 elif crud_choice == "Read":
-    data = run_sql("SELECT * FROM Food_Listings LIMIT 20")
+    data = run_sql("SELECT Food_ID, Food_Name, Food_Type, Meal_Type, Quantity, Expiry_Date, Provider_ID, Location FROM Food_Listings LIMIT 20", expect_scan=True)
     st.dataframe(data)
     if not data.empty:
-        st.download_button("⬇️ Download Food Listings", data.to_csv(index=False), "food_listings.csv", "text/csv")
+        st.download_button("⬇️ Download Food Listings", df_to_csv_bytes(data), "food_listings.csv", "text/csv")
 
 # ------------------------------
 # 📊 ALL 15+ QUERIES
 # ------------------------------
 st.subheader("📊 Analytics & Insights")
 
-queries = {
-    "Providers vs Receivers by City": """
-        SELECT City, COUNT(*) FILTER (WHERE tbl='Providers') AS Providers,
-               COUNT(*) FILTER (WHERE tbl='Receivers') AS Receivers,
-               COUNT(*) AS Total
-        FROM (
-          SELECT City, 'Providers' AS tbl FROM Providers
-          UNION ALL
-          SELECT City, 'Receivers' AS tbl FROM Receivers
-        )
-        GROUP BY City
-        ORDER BY Total DESC
-        LIMIT 10;
-    """,
-    "Top Provider Types by Quantity": """
-        SELECT p.Provider_Type, SUM(f.Quantity) AS Total_Quantity
-        FROM Food_Listings f
-        JOIN Providers p ON p.Provider_ID = f.Provider_ID
-        GROUP BY p.Provider_Type
-        ORDER BY Total_Quantity DESC
-        LIMIT 10;
-    """,
-    "Top Receivers by Claims": """
-        SELECT r.Receiver_ID, r.Name, COUNT(*) AS Claim_Count
-        FROM Claims c
-        JOIN Receivers r ON r.Receiver_ID = c.Receiver_ID
-        GROUP BY r.Receiver_ID, r.Name
-        ORDER BY Claim_Count DESC
-        LIMIT 10;
-    """,
-    "Total Food Available": """
-        SELECT SUM(Quantity) AS Total_Quantity FROM Food_Listings;
-    """,
-    "Most Common Food Types": """
-        SELECT Food_Type, COUNT(*) AS Count_Listings
-        FROM Food_Listings
-        GROUP BY Food_Type
-        ORDER BY Count_Listings DESC
-        LIMIT 10;
-    """,
-    "Claims Per Food Item": """
-        SELECT f.Food_Name, COUNT(c.Claim_ID) AS Claims
-        FROM Food_Listings f
-        LEFT JOIN Claims c ON c.Food_ID = f.Food_ID
-        GROUP BY f.Food_Name
-        ORDER BY Claims DESC
-        LIMIT 10;
-    """,
-    "Total Quantity by Provider": """
-        SELECT p.Name, SUM(f.Quantity) AS Total_Quantity
-        FROM Food_Listings f
-        JOIN Providers p ON p.Provider_ID = f.Provider_ID
-        GROUP BY p.Name
-        ORDER BY Total_Quantity DESC
-        LIMIT 10;
-    """,
-    "Claims by City": """
-        SELECT f.Location AS City, COUNT(*) AS Claims
-        FROM Claims c
-        JOIN Food_Listings f ON f.Food_ID = c.Food_ID
-        GROUP BY f.Location
-        ORDER BY Claims DESC
-        LIMIT 10;
-    """,
-    "Listings Near Expiry": f"""
-        SELECT Food_ID, Food_Name, Quantity, Expiry_Date, Location
-        FROM Food_Listings
-        WHERE date(Expiry_Date) <= date('{today}', '+1 day')
-        ORDER BY date(Expiry_Date) ASC;
-    """,
-    "Total Wasted Food": """
-        SELECT COUNT(*) AS Wasted_Listings, SUM(Quantity) AS Wasted_Quantity
-        FROM Food_Listings
-        WHERE date(Expiry_Date) < date('now');
-    """
-}
+# Fetch all results up front, then render in order; failed queries hold their error message
+try:
+    results = run_analytics(tuple((title, sql, query_params.get(title, ())) for title, sql in ANALYTICS_QUERIES.items()))
+except AnalyticsError as e:
+    results = e.results
 
-for title, sql in queries.items():
-    st.markdown(f"### {title}")
-    try:
-        df = run_sql(sql)
-        st.dataframe(df)
-        if not df.empty:
-            st.download_button(f"⬇️ Download {title}", df.to_csv(index=False), f"{title}.csv", "text/csv")
-    except Exception as e:
-        st.warning(f"⚠️ Query failed: {e}")
+for title in ANALYTICS_QUERIES:
+    panels = SPLIT_PANELS.get(title, {title: None})
+    df = results[title]
+    if isinstance(df, str):
+        st.markdown(f"### {title}")
+        st.warning(f"⚠️ Query failed: {df}")
+        continue
+    for panel, cols in panels.items():
+        panel_df = df if cols is None else df[cols]
+        st.markdown(f"### {panel}")
+        st.dataframe(panel_df)
+        if not panel_df.empty:
+            st.download_button(f"⬇️ Download {panel}", df_to_csv_bytes(panel_df), f"{panel}.csv", "text/csv")